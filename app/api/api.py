@@ -1,16 +1,31 @@
-from flask import Flask, request, jsonify
+import time
+
+# Inicio del arranque, para el desglose de tiempos que se escribe en app.log
+_startup = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import sys
-import pickle
-import networkx as nx
+import hmac
+import hashlib
 import logging
+import threading
 
 # Asegurarse de que Python reconozca la carpeta raíz del proyecto
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import DATA_MART_PATH
-from graph.graph import Graph
+from config import (
+    DATA_MART_PATH, GRAPH_PATH, GRAPH_SHARDS, GRAPH_SHARD_MANIFEST, GRAPH_SHARD_RUN_DIR,
+    GRAPH_SHARD_IDLE_SECONDS, GRAPH_SHARD_POOL_SIZE, GRAPH_SHARD_TIMEOUT, GRAPH_WATCH_INTERVAL, ADMIN_TOKEN,
+    RENDER_MAX_NODES, RENDER_MAX_RADIUS, RENDER_CACHE_BYTES, GRAPH_RETRY_AFTER,
+    QUERY_UNITS_PER_SECOND, QUERY_CPU_BUDGETS, QUERY_CONCURRENCY
+)
+# graph_store no importa networkx: se carga junto con el grafo, en segundo plano
+from graph.graph_store import GraphStore
+from graph.query_cost import QueryCostEstimator, AdmissionController, QueryRejected
+
+_imports_done = time.perf_counter()
 
 app = Flask(__name__)
 
@@ -27,31 +42,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cargar el grafo serializado
-graph = Graph()
-is_initialized = False
+# Cargar el grafo serializado. Cada petición toma la versión activa de `store`
+# al empezar, así que una recarga nunca afecta a peticiones en curso. Con
+# shards se lee sólo el manifest y los shards se comparten entre workers.
+if GRAPH_SHARDS > 0:
+    store = GraphStore(GRAPH_SHARD_MANIFEST, GRAPH_SHARDS, {
+        "run_dir": GRAPH_SHARD_RUN_DIR, "idle_seconds": GRAPH_SHARD_IDLE_SECONDS,
+        "pool_size": GRAPH_SHARD_POOL_SIZE, "timeout": GRAPH_SHARD_TIMEOUT
+    })
+else:
+    store = GraphStore(GRAPH_PATH)
 
 def load_graph():
-    global is_initialized
-    try:
-        serialized_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'graph.pkl')
-        if not os.path.isfile(serialized_path):
-            logger.error(f"Archivo serializado del grafo no encontrado en {serialized_path}")
-            return False
-        with open(serialized_path, 'rb') as f:
-            graph.graph = pickle.load(f)
-        is_initialized = True
-        logger.info(f"Grafo cargado exitosamente desde {serialized_path}: {graph.graph.number_of_nodes()} nodos, {graph.graph.number_of_edges()} aristas.")
-        return True
-    except Exception as e:
-        logger.error(f"Error al cargar el grafo serializado: {e}", exc_info=True)
-        return False
+    loaded = store.reload()
+    if loaded:
+        logger.info(f"Arranque: grafo listo {time.perf_counter() - _startup:.3f}s después del inicio.")
+    else:
+        logger.error("La aplicación sigue sin un grafo cargado.")
+    return loaded
 
-# Cargar el grafo al iniciar la aplicación
-if load_graph():
-    logger.info("La aplicación ha iniciado con el grafo ya cargado.")
-else:
-    logger.error("La aplicación ha iniciado sin un grafo cargado.")
+def _graph_unavailable():
+    if store.state == "failed":
+        body = {"error": "Grafo no inicializado correctamente.", "detail": store.last_error}
+    else:
+        body = {"error": "El grafo se está cargando, inténtelo de nuevo en unos segundos."}
+    return jsonify(body), 503, {"Retry-After": str(GRAPH_RETRY_AFTER)}
+
+# Cada consulta se estima antes de ejecutarse: las que superan el presupuesto
+# de CPU de su endpoint se rechazan (422) y las de cada clase de coste tienen
+# un límite de concurrencia (429)
+admission = AdmissionController(QUERY_CPU_BUDGETS, QUERY_CONCURRENCY)
+
+def _estimator(graph):
+    return QueryCostEstimator(graph, QUERY_UNITS_PER_SECOND)
+
+def _rejected(e: QueryRejected):
+    headers = {"Retry-After": "1"} if e.status == 429 else {}
+    return jsonify({
+        "error": e.message,
+        "estimate": e.estimate.to_dict(),
+        "cpu_budget_seconds": admission.budget_for(e.estimate.endpoint)
+    }), e.status, headers
+
+# Cargar el grafo en segundo plano: Flask acepta conexiones desde el inicio y
+# los endpoints del grafo responden 503 hasta que la carga termina
+threading.Thread(target=load_graph, name="graph-initial-load", daemon=True).start()
+
+if GRAPH_WATCH_INTERVAL > 0:
+    store.start_watcher(GRAPH_WATCH_INTERVAL)
+
+logger.info(
+    f"Arranque: imports {_imports_done - _startup:.3f}s, "
+    f"aplicación lista {time.perf_counter() - _startup:.3f}s; cargando grafo desde {store.path}."
+)
 
 @app.route("/", methods=["GET"])
 def index():
@@ -66,35 +109,69 @@ def index():
             "GET /isolated-nodes": "Encuentra todos los nodos sin conexiones",
             "GET /node-info?word=...": "Obtiene información detallada de un nodo específico",
             "GET /graph-stats": "Obtiene estadísticas generales del grafo",
+            "GET /central-nodes?top=10": "Retorna las palabras puente con mayor centralidad de intermediación",
+            "GET /render?word=...&radius=2&format=svg|png&layout=shell|spring": "Dibuja la red ego de una palabra",
+            "POST /admin/reload": "Recarga el grafo serializado sin reiniciar el servidor",
+            "GET /health/live": "Indica si el proceso está vivo",
+            "GET /health/ready": "Indica si el grafo está cargado y la API puede responder consultas",
             "GET /routes": "Lista todas las rutas disponibles en la API"
         }
     })
 
+@app.route("/health/live", methods=["GET"])
+def health_live():
+    return jsonify({"status": "alive"})
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    current = store.current()
+    if current is None:
+        return jsonify({"status": store.state, "detail": store.last_error}), 503, \
+            {"Retry-After": str(GRAPH_RETRY_AFTER)}
+    if hasattr(current.graph, "shard_health"):
+        # Un shard caído se reinicia en segundo plano; mientras tanto las
+        # consultas de sus longitudes fallarían, así que no se está listo
+        shards = current.graph.shard_health()
+        if not all(shard["alive"] for shard in shards):
+            return jsonify({"status": "degraded", "shards": shards, **current.info()}), 503, \
+                {"Retry-After": str(GRAPH_RETRY_AFTER)}
+        return jsonify({"status": "ready", "shards": shards, **current.info()})
+    return jsonify({"status": "ready", **current.info()})
+
 @app.route("/shortest-path", methods=["GET"])
 def get_shortest_path():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     w1 = request.args.get("word1")
     w2 = request.args.get("word2")
     if not w1 or not w2:
         return jsonify({"error": "Faltan parámetros: word1 y word2."}), 400
 
+    import networkx as nx  # ya cargado junto con el grafo
     try:
-        path = graph.shortest_path(w1, w2)
+        estimate = _estimator(graph).shortest_path(w1, w2)
+        with admission.admit(estimate):
+            path = graph.shortest_path(w1, w2)
         return jsonify({
             "path": [node.word for node in path],
             "length": len(path) - 1
         })
     except nx.NetworkXNoPath:
         return jsonify({"message": "No se encontró un camino entre las palabras dadas."}), 404
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al encontrar el camino más corto: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/all-paths", methods=["GET"])
 def get_all_paths():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     
     word1 = request.args.get("word1")
     word2 = request.args.get("word2")
@@ -104,81 +181,108 @@ def get_all_paths():
         return jsonify({"error": "Faltan parámetros: word1 y word2."}), 400
 
     try:
-        paths = graph.all_paths(word1, word2, cutoff)
+        estimate = _estimator(graph).all_paths(word1, word2, cutoff)
+        with admission.admit(estimate) as budget:
+            paths = graph.all_paths(word1, word2, cutoff, budget)
         return jsonify({
             "paths": [[node.word for node in path] for path in paths],
             "total_paths": len(paths)
         })
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al encontrar todos los caminos: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/max-distance", methods=["GET"])
 def get_max_distance():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     
     try:
-        longest_path = graph.max_distance_path()
+        estimate = _estimator(graph).max_distance()
+        with admission.admit(estimate) as budget:
+            longest_path = graph.max_distance_path(budget)
         if not longest_path:
             return jsonify({"message": "No se encontró ningún camino en el grafo."}), 404
         return jsonify({
             "path": [node.word for node in longest_path],
             "length": len(longest_path) - 1
         })
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al encontrar el camino más largo: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/clusters", methods=["GET"])
 def get_clusters():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     try:
-        clusters = graph.clusters()
+        with admission.admit(_estimator(graph).linear("clusters")):
+            clusters = graph.clusters()
         cluster_list = [[node.word for node in cluster] for cluster in clusters]
         return jsonify({
             "clusters": cluster_list,
             "total_clusters": len(cluster_list)
         })
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al obtener clusters: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/high-connectivity", methods=["GET"])
 def get_high_connectivity():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     degree = request.args.get("degree", 2, type=int)
     try:
-        nodes = graph.high_connectivity_nodes(degree)
+        with admission.admit(_estimator(graph).linear("high-connectivity")):
+            nodes = graph.high_connectivity_nodes(degree)
         return jsonify({
             "nodes": [n.word for n in nodes],
             "count": len(nodes)
         })
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al obtener nodos de alta conectividad: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/isolated-nodes", methods=["GET"])
 def get_isolated_nodes():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     
     try:
-        isolated = graph.get_isolated_nodes()
+        with admission.admit(_estimator(graph).linear("isolated-nodes")):
+            isolated = graph.get_isolated_nodes()
         return jsonify({
             "isolated_nodes": [node.word for node in isolated],
             "count": len(isolated)
         })
+    except QueryRejected as e:
+        return _rejected(e)
     except Exception as e:
         logger.error(f"Error al encontrar nodos aislados: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/node-info", methods=["GET"])
 def get_node_info():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     
     word = request.args.get("word")
     if not word:
@@ -197,20 +301,129 @@ def get_node_info():
 
 @app.route("/graph-stats", methods=["GET"])
 def get_graph_stats():
-    if not is_initialized:
-        return jsonify({"error": "Grafo no inicializado correctamente."}), 500
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
     
     try:
+        with admission.admit(_estimator(graph).linear("graph-stats")):
+            stats = {
+                "total_nodes": graph.number_of_nodes(),
+                "total_edges": graph.number_of_edges(),
+                "density": graph.get_graph_density(),
+                "connectivity": graph.get_node_connectivity(),
+                **current.info()
+            }
+        if hasattr(graph, "shard_info"):
+            stats["shards"] = graph.shard_info()
+        return jsonify(stats)
+    except QueryRejected as e:
+        return _rejected(e)
+    except Exception as e:
+        logger.error(f"Error al obtener estadísticas del grafo: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/central-nodes", methods=["GET"])
+def get_central_nodes():
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
+
+    top = request.args.get("top", 10, type=int)
+    if not 1 <= top <= 1000:
+        return jsonify({"error": "top debe estar entre 1 y 1000."}), 400
+
+    try:
+        central = graph.central_nodes(top)
+        if central is None:
+            return jsonify({"message": "Centralidad no calculada; ejecute compute_centrality.py."}), 404
         return jsonify({
-            "total_nodes": graph.graph.number_of_nodes(),
-            "total_edges": graph.graph.number_of_edges(),
-            "density": graph.get_graph_density(),
-            "connectivity": graph.get_node_connectivity()
+            "nodes": [{"word": node.word, "betweenness": score} for node, score in central],
+            "count": len(central),
+            "meta": graph.centrality_meta()
         })
     except Exception as e:
-        logger.error(f"Error al obtener estadísticas del grafo: {e}", exc_info=True)
+        logger.error(f"Error al obtener nodos centrales: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/render", methods=["GET"])
+def render_node():
+    current = store.current()
+    if current is None:
+        return _graph_unavailable()
+    graph = current.graph
+
+    word = request.args.get("word")
+    radius = request.args.get("radius", 2, type=int)
+    fmt = request.args.get("format", "svg")
+    layout = request.args.get("layout", "shell")
+    if not word:
+        return jsonify({"error": "Falta el parámetro: word."}), 400
+    if not 0 <= radius <= RENDER_MAX_RADIUS:
+        return jsonify({"error": f"radius debe estar entre 0 y {RENDER_MAX_RADIUS}."}), 400
+
+    # Importación diferida: matplotlib sólo se carga si se usa este endpoint
+    from graph.graph_renderer import render_ego_network, RenderCache, FORMATS, LAYOUTS
+    if fmt not in FORMATS or layout not in LAYOUTS:
+        return jsonify({"error": f"Parámetros no válidos: format={list(FORMATS)}, layout={list(LAYOUTS)}."}), 400
+
+    # La imagen sólo depende de los parámetros y de la versión del grafo: el
+    # ETag las combina y el cliente revalida (no-cache) tras cada recarga
+    key = (word, radius, fmt, layout)
+    etag = f"{current.version}-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["X-Graph-Version"] = current.version
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    # La caché pertenece a la versión activa y se descarta al recargar el grafo
+    cache = current.cache("render", lambda: RenderCache(RENDER_CACHE_BYTES))
+    image = cache.get(key)
+    if image is None:
+        try:
+            subgraph, distances = graph.ego_network(word, radius, RENDER_MAX_NODES)
+            if subgraph is None:
+                return jsonify({"message": f"La palabra '{word}' no está en el grafo."}), 404
+            # El dibujo no se puede cancelar a medias, pero sí limitar cuántos
+            # se hacen a la vez según su coste
+            estimate = _estimator(graph).render(subgraph.number_of_nodes())
+            with admission.admit(estimate):
+                image = render_ego_network(subgraph, distances, fmt, layout)
+        except QueryRejected as e:
+            return _rejected(e)
+        except Exception as e:
+            logger.error(f"Error al dibujar la red ego: {e}", exc_info=True)
+            return jsonify({"error": str(e)}), 500
+        cache.put(key, image)
+
+    response = Response(image, mimetype=FORMATS[fmt])
+    response.set_etag(etag)
+    response.headers["X-Graph-Version"] = current.version
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def _is_admin_request() -> bool:
+    # Detrás de ProxyFix remote_addr sale de X-Forwarded-For y el peer real
+    # es nginx en 127.0.0.1, así que la dirección no sirve para autorizar:
+    # sin ADMIN_TOKEN no se acepta ninguna petición de administración
+    if not ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+@app.route("/admin/reload", methods=["POST"])
+def reload_graph():
+    if not _is_admin_request():
+        return jsonify({"error": "No autorizado."}), 403
+    current = store.current()
+    active = current.info() if current else None
+    if not store.reload_async():
+        return jsonify({"message": "Ya hay una recarga en curso.", "active": active}), 409
+    return jsonify({"message": "Recarga iniciada.", "active": active}), 202
+
 @app.route("/routes", methods=["GET"])
 def list_routes():
     import urllib
@@ -0,0 +1,75 @@
+# compute_centrality.py
+
+import os
+import time
+import pickle
+import logging
+import argparse
+from datetime import datetime, timezone
+
+from graph.centrality import estimate_betweenness
+from graph.shard_artifacts import MANIFEST_NAME, write_shard_artifacts
+
+from config import GRAPH_PATH, GRAPH_SHARD_DIR
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(name)s %(message)s',
+    handlers=[
+        logging.FileHandler("compute_centrality.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estima la centralidad de intermediación y la guarda en el grafo serializado."
+    )
+    parser.add_argument("--samples", type=int, default=2000,
+                        help="Fuentes BFS muestreadas; más muestras = más precisión y más tiempo")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Procesos del pool (por defecto, núcleos disponibles)")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla del muestreo")
+    parser.add_argument("--graph", default=GRAPH_PATH, help="Ruta del grafo serializado")
+    args = parser.parse_args()
+
+    try:
+        with open(args.graph, 'rb') as f:
+            g = pickle.load(f)
+        logger.info(f"Calculando centralidad con {args.samples} muestras sobre "
+                    f"{g.number_of_nodes()} nodos y {g.number_of_edges()} aristas")
+
+        start = time.perf_counter()
+        scores = estimate_betweenness(g, args.samples, args.processes, args.seed)
+        elapsed = time.perf_counter() - start
+
+        # Se guarda por palabra y sólo para nodos con centralidad > 0
+        g.graph["betweenness"] = {node.word: score for node, score in scores.items()}
+        g.graph["betweenness_meta"] = {
+            "samples": args.samples,
+            "seed": args.seed,
+            "exact": args.samples >= g.number_of_nodes(),
+            "seconds": round(elapsed, 2),
+            "computed_at": datetime.now(timezone.utc).isoformat()
+        }
+        logger.info(f"Centralidad calculada en {elapsed:.2f}s para {len(scores)} nodos")
+
+        # Reemplazo atómico: una API con recarga en caliente verá el artefacto completo
+        tmp_path = args.graph + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(g, f)
+        os.replace(tmp_path, args.graph)
+        logger.info(f"Grafo con centralidad serializado en {args.graph}")
+
+        # Los artefactos por longitud del modo con shards llevan su parte
+        if args.graph == GRAPH_PATH and os.path.exists(os.path.join(GRAPH_SHARD_DIR, MANIFEST_NAME)):
+            write_shard_artifacts(g, GRAPH_SHARD_DIR)
+            logger.info(f"Centralidad repartida en los artefactos de {GRAPH_SHARD_DIR}")
+
+    except Exception as e:
+        logger.error(f"Error al calcular la centralidad: {e}", exc_info=True)
+
+if __name__ == "__main__":
+    main()
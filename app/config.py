@@ -1,6 +1,7 @@
 # app/config.py
 
 import os
+import tempfile
 
 # Obtener la ruta absoluta del directorio actual (app/)
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,4 +11,65 @@ PROJECT_ROOT = os.path.dirname(current_dir)
 
 # Definir las rutas hacia datalake y datamart
 DATA_LAKE_PATH = os.path.join(PROJECT_ROOT, "datalake")
-DATA_MART_PATH = os.path.join(PROJECT_ROOT, "datamart")
\ No newline at end of file
+DATA_MART_PATH = os.path.join(PROJECT_ROOT, "datamart")
+
+# Artefacto serializado del grafo que sirve la API
+GRAPH_PATH = os.path.join(current_dir, "graph.pkl")
+
+# Número de procesos shard entre los que repartir el grafo por longitud de palabra (0 = sin shards)
+GRAPH_SHARDS = int(os.environ.get("GRAPH_SHARDS", "0"))
+
+# Artefactos del modo con shards: graph_{n}.pkl por longitud y su manifest.json
+GRAPH_SHARD_DIR = os.path.join(current_dir, "graph_shards")
+GRAPH_SHARD_MANIFEST = os.path.join(GRAPH_SHARD_DIR, "manifest.json")
+
+# Sockets de los shards, compartidos por todos los procesos de la API del host
+GRAPH_SHARD_RUN_DIR = os.environ.get(
+    "GRAPH_SHARD_RUN_DIR", os.path.join(tempfile.gettempdir(), f"grafo-shards-{os.getuid()}")
+)
+
+# Segundos que sigue vivo un shard sin ningún proceso de la API conectado
+GRAPH_SHARD_IDLE_SECONDS = float(os.environ.get("GRAPH_SHARD_IDLE_SECONDS", "60"))
+
+# Conexiones simultáneas de cada proceso de la API con cada shard
+GRAPH_SHARD_POOL_SIZE = int(os.environ.get("GRAPH_SHARD_POOL_SIZE", "8"))
+
+# Segundos máximos de espera por una conexión libre o por una respuesta de un shard
+GRAPH_SHARD_TIMEOUT = float(os.environ.get("GRAPH_SHARD_TIMEOUT", "30"))
+
+# Segundos sugeridos en Retry-After mientras el grafo se está cargando
+GRAPH_RETRY_AFTER = int(os.environ.get("GRAPH_RETRY_AFTER", "5"))
+
+# Segundos entre comprobaciones de cambios en GRAPH_PATH (0 = desactivado)
+GRAPH_WATCH_INTERVAL = float(os.environ.get("GRAPH_WATCH_INTERVAL", "0"))
+
+# Token requerido por los endpoints /admin (sin token, los endpoints /admin están desactivados)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Límites del endpoint /render
+RENDER_MAX_NODES = int(os.environ.get("RENDER_MAX_NODES", "200"))
+RENDER_MAX_RADIUS = int(os.environ.get("RENDER_MAX_RADIUS", "4"))
+# Tamaño máximo, en MB, de la caché de imágenes de cada versión del grafo en cada proceso
+RENDER_CACHE_BYTES = int(float(os.environ.get("RENDER_CACHE_MB", "32")) * 1024 * 1024)
+
+# Control de admisión de consultas (ver graph/query_cost.py)
+# Unidades de trabajo (~ vecinos examinados) que se procesan por segundo de CPU.
+# Se recorren ~1e6 por segundo, pero la estimación de all-paths se queda hasta
+# 3 veces corta en búsquedas profundas. El valor por defecto absorbe la mayor
+# parte de ese margen, no todo (milk->body con cutoff 8: 10.7s estimados, 14.1s
+# reales): el límite estricto es la cancelación por QueryBudget
+QUERY_UNITS_PER_SECOND = float(os.environ.get("QUERY_UNITS_PER_SECOND", "300000"))
+
+# Presupuesto de CPU por petición, en segundos, por endpoint
+QUERY_CPU_BUDGETS = {
+    "default": float(os.environ.get("QUERY_CPU_BUDGET", "2")),
+    "all-paths": float(os.environ.get("QUERY_CPU_BUDGET_ALL_PATHS", "5")),
+    "max-distance": float(os.environ.get("QUERY_CPU_BUDGET_MAX_DISTANCE", "10")),
+}
+
+# Consultas simultáneas por clase de coste en cada proceso
+QUERY_CONCURRENCY = {
+    "cheap": int(os.environ.get("QUERY_CONCURRENCY_CHEAP", "64")),
+    "moderate": int(os.environ.get("QUERY_CONCURRENCY_MODERATE", "8")),
+    "expensive": int(os.environ.get("QUERY_CONCURRENCY_EXPENSIVE", "2")),
+}
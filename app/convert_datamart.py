@@ -0,0 +1,39 @@
+# convert_datamart.py
+
+import logging
+
+from packed_words import convert_datamart
+
+from config import DATA_MART_PATH
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(name)s %(message)s',
+    handlers=[
+        logging.FileHandler("convert_datamart.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """
+    Genera words_{n}.bin junto a cada words_{n}.txt de datamart/.
+    Los .txt se conservan y siguen siendo legibles como alternativa.
+    """
+    try:
+        converted = convert_datamart(DATA_MART_PATH)
+        if not converted:
+            logger.warning("No se encontraron ficheros de palabras en datamart.")
+            return
+        for length, count in sorted(converted.items()):
+            if count is None:
+                logger.warning(f"words_{length}.txt contiene palabras no ASCII; se mantiene sólo en texto.")
+            else:
+                logger.info(f"words_{length}.bin: {count} palabras")
+    except Exception as e:
+        logger.error(f"Error al convertir datamart: {e}", exc_info=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 # Cambios en tu repositorio local# graph/graph.py
 
 # Cambios en tu repositorio local
+import heapq
 import networkx as nx
 from .node import Node
+from .query_cost import QueryBudgetExceeded
 
 class Graph:
     def __init__(self):
         self.graph = nx.Graph()
+        # Índice de componentes conexas, calculado la primera vez que se usa
+        self._components = None
 
     def add_node(self, word: str):
         n = Node(word)
         self.graph.add_node(n)
+        self._components = None
 
     def add_edge(self, w1: str, w2: str) -> bool:
         n1 = Node(w1)
@@ -22,6 +27,7 @@ class Graph:
         if self._is_one_letter_apart(w1, w2):
             if not self.graph.has_edge(n1, n2):
                 self.graph.add_edge(n1, n2)
+                self._components = None
                 return True
         return False
 
@@ -30,6 +36,12 @@ class Graph:
             return False
         return sum(a != b for a, b in zip(w1, w2)) == 1
 
+    def number_of_nodes(self) -> int:
+        return self.graph.number_of_nodes()
+
+    def number_of_edges(self) -> int:
+        return self.graph.number_of_edges()
+
     def shortest_path(self, w1: str, w2: str):
         """
         Encuentra el camino más corto entre dos palabras.
@@ -48,7 +60,78 @@ class Graph:
         """
         return [n for n in self.graph.nodes if self.graph.degree(n) >= threshold]
 
-    def all_paths(self, w1: str, w2: str, cutoff: int = None):
+    def _component_index(self):
+        """
+        Retorna ({nodo: id de componente}, [(nodos, aristas, suma de grados²) por componente]).
+        """
+        if self._components is None:
+            membership = {}
+            sizes = []
+            for cid, component in enumerate(nx.connected_components(self.graph)):
+                degrees = [self.graph.degree(node) for node in component]
+                for node in component:
+                    membership[node] = cid
+                sizes.append((len(component), sum(degrees) // 2, sum(d * d for d in degrees)))
+            self._components = (membership, sizes)
+        return self._components
+
+    def component_profile(self, word: str):
+        """
+        Tamaño de la componente de una palabra y su grado, para estimar el
+        coste de las consultas (ver query_cost).
+
+        Returns:
+            dict: {component, nodes, edges, degree_sq, degree} o None si la palabra no existe
+        """
+        node = Node(word)
+        membership, sizes = self._component_index()
+        if node not in membership:
+            return None
+        cid = membership[node]
+        nodes, edges, degree_sq = sizes[cid]
+        return {"component": cid, "nodes": nodes, "edges": edges, "degree_sq": degree_sq,
+                "degree": self.graph.degree(node)}
+
+    def component_sizes(self):
+        """
+        Retorna [(nodos, aristas, suma de grados²)] de cada componente conexa.
+        """
+        return list(self._component_index()[1])
+
+    def _simple_paths(self, source: Node, target: Node, cutoff: int = None, budget=None):
+        """
+        Caminos simples de source a target (DFS iterativa, mismo orden que
+        nx.all_simple_paths). Comprueba `budget` en cada paso para poder
+        cancelar búsquedas largas.
+        """
+        if cutoff is None:
+            cutoff = len(self.graph) - 1
+        if cutoff < 0:
+            return
+        # Como networkx, el camino de un nodo a sí mismo es el propio nodo
+        if source == target:
+            yield [source]
+            return
+        if cutoff < 1:
+            return
+        visited = {source: None}
+        stack = [iter(self.graph[source])]
+        while stack:
+            if budget is not None:
+                budget.check()
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                visited.popitem()
+            elif child in visited:
+                continue
+            elif child == target:
+                yield list(visited) + [child]
+            elif len(visited) < cutoff:
+                visited[child] = None
+                stack.append(iter(self.graph[child]))
+
+    def all_paths(self, w1: str, w2: str, cutoff: int = None, budget=None):
         """
         Encuentra todos los caminos posibles entre dos palabras.
         
@@ -56,6 +139,7 @@ class Graph:
             w1 (str): Palabra de origen
             w2 (str): Palabra de destino
             cutoff (int, optional): Longitud máxima del camino
+            budget (QueryBudget, optional): Presupuesto de CPU; cancela la búsqueda al agotarse
             
         Returns:
             list: Lista de caminos, donde cada camino es una lista de nodos
@@ -64,37 +148,47 @@ class Graph:
         n2 = Node(w2)
         if n1 not in self.graph or n2 not in self.graph:
             return []
-        return list(nx.all_simple_paths(self.graph, n1, n2, cutoff=cutoff))
+        # Sin camino posible entre componentes distintas: no hace falta recorrer
+        membership, _ = self._component_index()
+        if membership[n1] != membership[n2]:
+            return []
+        return list(self._simple_paths(n1, n2, cutoff, budget))
 
-    def max_distance_path(self):
+    def max_distance_path(self, budget=None):
         """
         Encuentra el camino más largo sin ciclos en el grafo.
         Implementación para grafos no dirigidos usando fuerza bruta controlada.
         
+        Args:
+            budget (QueryBudget, optional): Presupuesto de CPU; cancela la búsqueda al agotarse
+
         Returns:
             list: Lista de nodos que forman el camino más largo
         """
         longest_path = []
         max_length = 0
         
-        # Obtener todos los nodos del grafo
-        nodes = list(self.graph.nodes())
+        # Sólo hay caminos entre nodos de la misma componente
+        membership, _ = self._component_index()
+        components = {}
+        for node, cid in membership.items():
+            components.setdefault(cid, []).append(node)
         
         # Para cada par de nodos, encontrar el camino más largo entre ellos
-        for i, source in enumerate(nodes):
-            for target in nodes[i+1:]:  # Evitamos pares redundantes
-                try:
-                    # Encontrar todos los caminos simples entre source y target
-                    paths = nx.all_simple_paths(self.graph, source, target)
-                    for path in paths:
-                        if len(path) > max_length:
-                            max_length = len(path)
-                            longest_path = path
-                except nx.NetworkXNoPath:
-                    continue
-                except Exception as e:
-                    print(f"Error al procesar el par {source}-{target}: {e}")
-                    continue
+        for nodes in components.values():
+            for i, source in enumerate(nodes):
+                for target in nodes[i+1:]:  # Evitamos pares redundantes
+                    try:
+                        # Encontrar todos los caminos simples entre source y target
+                        for path in self._simple_paths(source, target, budget=budget):
+                            if len(path) > max_length:
+                                max_length = len(path)
+                                longest_path = path
+                    except QueryBudgetExceeded:
+                        raise
+                    except Exception as e:
+                        print(f"Error al procesar el par {source}-{target}: {e}")
+                        continue
         
         # Si no se encontró ningún camino, devolver lista vacía
         if not longest_path:
@@ -147,5 +241,57 @@ class Graph:
         except:
             return 0
 
+    def central_nodes(self, top: int):
+        """
+        Retorna los nodos con mayor centralidad de intermediación, calculada
+        previamente por compute_centrality.py y guardada en el artefacto.
+
+        Returns:
+            list: Lista de (Node, centralidad) o None si no se ha calculado
+        """
+        scores = self.graph.graph.get("betweenness")
+        if scores is None:
+            return None
+        best = heapq.nlargest(top, scores.items(), key=lambda item: item[1])
+        return [(Node(word), score) for word, score in best]
+
+    def centrality_meta(self) -> dict:
+        return self.graph.graph.get("betweenness_meta", {})
+
+    def ego_network(self, word: str, radius: int, max_nodes: int):
+        """
+        Extrae la red ego de una palabra: los nodos a distancia <= radius.
+        El recorrido BFS se detiene al alcanzar max_nodes, así que el coste
+        no depende del tamaño total del grafo.
+
+        Returns:
+            tuple: (subgrafo, {nodo: distancia al centro}) o (None, {}) si la palabra no existe
+        """
+        center = Node(word)
+        if center not in self.graph:
+            return None, {}
+        distances = {center: 0}
+        frontier = [center]
+        for depth in range(1, radius + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self.graph.neighbors(node):
+                    if neighbor in distances:
+                        continue
+                    if len(distances) >= max_nodes:
+                        break
+                    distances[neighbor] = depth
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+            if not frontier:
+                break
+        return self.graph.subgraph(distances).copy(), distances
+
+    def close(self):
+        """
+        Libera los recursos del grafo. No hace nada en un grafo local;
+        existe por simetría con ShardedGraph.
+        """
+
     def __repr__(self):
         return f"Graph with {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges."
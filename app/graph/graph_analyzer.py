@@ -2,7 +2,6 @@
 
 import networkx as nx
 from typing import Optional, List
-import matplotlib.pyplot as plt
 
 class GraphAnalyzer:
     """
@@ -112,11 +111,26 @@ class GraphAnalyzer:
         Retorna lista de nodos sin aristas (aislados).
         """
         return list(nx.isolates(self.graph))
+
+    def betweenness_centrality(self, samples: int = 1000, processes: Optional[int] = None,
+                               seed: Optional[int] = None) -> dict:
+        """
+        Centralidad de intermediación estimada con `samples` fuentes BFS
+        repartidas en un pool de procesos (ver graph.centrality).
+        Detecta palabras puente, a diferencia del grado.
+        """
+        from .centrality import estimate_betweenness
+        return estimate_betweenness(self.graph, samples, processes, seed)
     
     def visualize_graph(self, show_labels: bool = True):
         """
         Dibuja el grafo usando matplotlib. El layout por defecto es 'spring_layout'.
+        Pensado para grafos pequeños en local: abre una ventana y el layout
+        crece más que linealmente con el número de nodos. En el servidor,
+        usar el endpoint /render, que dibuja sólo la red ego de una palabra.
         """
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 8))  # Ajusta el tamaño a tu gusto
         pos = nx.spring_layout(self.graph)  # Calcula posiciones para cada nodo
         
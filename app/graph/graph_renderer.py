@@ -0,0 +1,101 @@
+# graph/graph_renderer.py
+
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import networkx as nx
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .node import Node
+
+# Colores por distancia al centro; a partir del último se repite
+DISTANCE_COLORS = ['tomato', 'orange', 'gold', 'lightgreen', 'lightblue']
+
+LAYOUTS = ('shell', 'spring')
+FORMATS = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+
+class RenderCache:
+    """
+    Caché LRU de imágenes limitada por el total de bytes, no por número de
+    entradas: un PNG de radio 4 puede ocupar más de 1 MB. Segura entre hilos.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+            return image
+
+    def put(self, key, image: bytes):
+        # Una sola imagen no puede ocupar más de una cuarta parte de la caché
+        if len(image) > self.max_bytes // 4:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._items[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _layout(subgraph: nx.Graph, distances: Dict[Node, int], layout: str):
+    if layout == 'spring':
+        # Semilla fija: la misma red ego produce siempre la misma imagen
+        return nx.spring_layout(subgraph, seed=42, iterations=50)
+    # Anillos concéntricos por distancia al centro, coste lineal
+    shells = {}
+    for node, depth in distances.items():
+        shells.setdefault(depth, []).append(node)
+    return nx.shell_layout(subgraph, nlist=[shells[d] for d in sorted(shells)])
+
+
+def render_ego_network(subgraph: nx.Graph, distances: Dict[Node, int],
+                       fmt: str = 'svg', layout: str = 'shell') -> bytes:
+    """
+    Dibuja una red ego y retorna la imagen codificada en `fmt` (svg o png).
+
+    Usa directamente el backend Agg sin pasar por pyplot, por lo que no
+    necesita pantalla ni comparte estado global entre hilos.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout no soportado: {layout}")
+
+    n = subgraph.number_of_nodes()
+    side = min(4 + n / 15, 14)
+    fig = Figure(figsize=(side, side))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    pos = _layout(subgraph, distances, layout)
+    nodes = list(subgraph.nodes)
+    colors = [DISTANCE_COLORS[min(distances[node], len(DISTANCE_COLORS) - 1)] for node in nodes]
+
+    nx.draw_networkx_edges(subgraph, pos, ax=ax, edge_color='gray', alpha=0.6)
+    nx.draw_networkx_nodes(subgraph, pos, ax=ax, nodelist=nodes, node_color=colors,
+                           node_size=300 if n <= 60 else 120, alpha=0.9)
+    nx.draw_networkx_labels(subgraph, pos, ax=ax,
+                            labels={node: node.word for node in nodes},
+                            font_size=9 if n <= 60 else 6)
+    ax.axis('off')
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches='tight')
+    return buf.getvalue()
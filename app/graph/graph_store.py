@@ -0,0 +1,271 @@
+# graph/graph_store.py
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# networkx y las clases del grafo se importan al cargar el artefacto, no al
+# importar este módulo, para que la API pueda aceptar conexiones antes
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se mantiene viva una versión retirada para que terminen
+# las peticiones en curso antes de liberar sus recursos (shards)
+RETIRE_GRACE_SECONDS = 60
+
+
+class GraphValidationError(Exception):
+    pass
+
+
+class GraphVersion:
+    """
+    Instantánea inmutable de una versión cargada del grafo.
+
+    Cada petición toma una referencia a la versión activa al empezar y
+    trabaja con ella hasta terminar, aunque mientras tanto se publique otra.
+    Las cachés dependientes del grafo viven aquí, de modo que se descartan
+    junto con la versión a la que pertenecen.
+    """
+    def __init__(self, graph, version: str, generation: int,
+                 path: str, load_seconds: float, timings: Optional[dict] = None):
+        self.graph = graph
+        self.version = version
+        self.generation = generation
+        self.path = path
+        self.load_seconds = load_seconds
+        self.timings = timings or {}
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.caches = {}
+        self._caches_lock = threading.Lock()
+
+    def cache(self, name: str, factory: Callable = dict):
+        """
+        Retorna la caché `name` de esta versión, creándola con `factory` si no existe.
+        """
+        with self._caches_lock:
+            if name not in self.caches:
+                self.caches[name] = factory()
+            return self.caches[name]
+
+    def clear_caches(self):
+        with self._caches_lock:
+            self.caches.clear()
+
+    def info(self) -> dict:
+        return {
+            "graph_version": self.version,
+            "generation": self.generation,
+            "loaded_at": self.loaded_at,
+            "load_duration_seconds": round(self.load_seconds, 4),
+            "load_timings": {phase: round(t, 4) for phase, t in self.timings.items()}
+        }
+
+
+def validate_graph(g, sample_size: int = 1000):
+    """
+    Comprueba que el artefacto deserializado es un grafo de palabras válido.
+    Revisa el tipo, que no esté vacío y una muestra de nodos y aristas.
+    """
+    import networkx as nx
+    from .node import Node
+
+    if not isinstance(g, nx.Graph):
+        raise GraphValidationError(f"El artefacto no es un nx.Graph: {type(g).__name__}")
+    if g.number_of_nodes() == 0:
+        raise GraphValidationError("El grafo no contiene nodos.")
+    for i, node in enumerate(g.nodes):
+        if i >= sample_size:
+            break
+        if not isinstance(node, Node):
+            raise GraphValidationError(f"Nodo con tipo inesperado: {node!r}")
+    for i, (u, v) in enumerate(g.edges):
+        if i >= sample_size:
+            break
+        if len(u.word) != len(v.word) or sum(a != b for a, b in zip(u.word, v.word)) != 1:
+            raise GraphValidationError(f"Arista inválida entre {u.word} y {v.word}")
+
+
+def load_graph_file(path: str, shards: int = 0, active_version: Optional[str] = None,
+                    shard_options: Optional[dict] = None) -> Optional[GraphVersion]:
+    """
+    Deserializa y valida el grafo en `path`. No modifica ningún estado global.
+    Con shards > 0, `path` es el manifest de los artefactos por longitud:
+    este proceso sólo lo lee y cada shard carga sus artefactos de disco;
+    `shard_options` se pasa a ShardedGraph (run_dir, idle_seconds).
+
+    Retorna None, sin deserializar ni construir nada, si el contenido
+    coincide con `active_version`.
+    """
+    timings = {}
+    start = last = time.perf_counter()
+
+    def phase(name):
+        nonlocal last
+        now = time.perf_counter()
+        timings[name] = now - last
+        last = now
+
+    if shards > 0:
+        from .shard_artifacts import read_manifest
+        from .sharded_graph import ShardedGraph
+        manifest, version = read_manifest(path)
+        if version == active_version:
+            return None
+        phase("read")
+        graph = ShardedGraph(path, manifest, version, shards, **(shard_options or {}))
+        phase("build")
+        graph.component_sizes()
+        phase("index")
+        return GraphVersion(graph, version, 0, path, time.perf_counter() - start, timings)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    version = hashlib.sha256(data).hexdigest()[:12]
+    if version == active_version:
+        return None
+    phase("read")
+    g = pickle.loads(data)
+    del data
+    phase("deserialize")
+    validate_graph(g)
+    phase("validate")
+    from .graph import Graph
+    graph = Graph()
+    graph.graph = g
+    phase("build")
+    # Índice de componentes que usa la estimación de coste de las consultas
+    graph.component_sizes()
+    phase("index")
+    return GraphVersion(graph, version, 0, path, time.perf_counter() - start, timings)
+
+
+class GraphStore:
+    """
+    Mantiene la versión activa del grafo servido y permite sustituirla en
+    caliente. La carga y validación se hacen fuera de la referencia activa;
+    el cambio de versión es una única asignación, por lo que las peticiones
+    en curso terminan sobre la versión anterior.
+    """
+    def __init__(self, path: str, shards: int = 0, shard_options: Optional[dict] = None):
+        self.path = path
+        self.shards = shards
+        self.shard_options = shard_options
+        self._current: Optional[GraphVersion] = None
+        self._reload_lock = threading.Lock()
+        self._generation = 0
+        self._watched_stat = None
+        self.last_error: Optional[str] = None
+
+    def current(self) -> Optional[GraphVersion]:
+        return self._current
+
+    @property
+    def state(self) -> str:
+        """
+        "ready" si hay una versión publicada, "failed" si la última carga
+        falló sin haber ninguna, y "loading" en otro caso.
+        """
+        if self._current is not None:
+            return "ready"
+        if self.last_error is not None and not self.is_reloading:
+            return "failed"
+        return "loading"
+
+    @property
+    def is_reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    def reload(self) -> bool:
+        """
+        Carga el artefacto de forma síncrona y, si es válido, lo publica.
+        Si falla, se mantiene la versión activa.
+        """
+        with self._reload_lock:
+            return self._reload_locked()
+
+    def reload_async(self) -> bool:
+        """
+        Lanza la recarga en un hilo en segundo plano.
+        Retorna False si ya hay una recarga en curso.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._reload_locked()
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name="graph-reload", daemon=True).start()
+        return True
+
+    def _reload_locked(self) -> bool:
+        stat = self._stat()
+        try:
+            if stat is None:
+                raise FileNotFoundError(f"Archivo serializado del grafo no encontrado en {self.path}")
+            previous = self._current
+            new = load_graph_file(self.path, self.shards, previous.version if previous else None,
+                                  self.shard_options)
+        except Exception as e:
+            # No reintentar hasta que el artefacto vuelva a cambiar
+            self._watched_stat = stat
+            self.last_error = str(e)
+            logger.error(f"Error al cargar el grafo serializado: {e}", exc_info=True)
+            return False
+
+        if new is None:
+            logger.info(f"El grafo en {self.path} no ha cambiado (versión {previous.version}).")
+            self._watched_stat = stat
+            self.last_error = None
+            return True
+
+        self._generation += 1
+        new.generation = self._generation
+        self._current = new
+        self._watched_stat = stat
+        self.last_error = None
+        logger.info(
+            f"Grafo cargado exitosamente desde {self.path}: {new.graph.number_of_nodes()} nodos, "
+            f"{new.graph.number_of_edges()} aristas (versión {new.version}, {new.load_seconds:.2f}s: "
+            + ", ".join(f"{phase} {t:.2f}s" for phase, t in new.timings.items()) + ")."
+        )
+        if previous is not None:
+            # Las peticiones en curso ya tienen sus datos: las cachés de la
+            # versión retirada no se vuelven a servir y se liberan ya
+            previous.clear_caches()
+            timer = threading.Timer(RETIRE_GRACE_SECONDS, previous.graph.close)
+            timer.daemon = True
+            timer.start()
+        return True
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def start_watcher(self, interval: float):
+        """
+        Vigila el artefacto y lo recarga cuando cambia su fecha o tamaño.
+        Útil con varios workers, donde cada proceso tiene su propia copia.
+        """
+        def watch():
+            while True:
+                time.sleep(interval)
+                if self.is_reloading:
+                    continue
+                stat = self._stat()
+                if stat is not None and stat != self._watched_stat:
+                    logger.info(f"Detectado cambio en {self.path}, recargando grafo.")
+                    self.reload()
+
+        threading.Thread(target=watch, name="graph-watcher", daemon=True).start()
@@ -0,0 +1,223 @@
+# graph/query_cost.py
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Umbrales de cada clase de coste, como fracción del presupuesto de CPU del
+# endpoint: así toda clase tiene consultas admisibles sea cual sea el presupuesto
+COST_CLASSES = (("cheap", 0.1), ("moderate", 0.5), ("expensive", float("inf")))
+
+# Tope de las estimaciones, para no desbordar con crecimientos exponenciales
+MAX_UNITS = 1e18
+
+# Dibujo de una red ego con matplotlib: se midieron ~30 ms fijos y ~3.5 ms de
+# CPU por nodo (PNG, algo menos en SVG). En unidades, con el valor por
+# defecto de QUERY_UNITS_PER_SECOND (3e5), y redondeado al alza
+RENDER_BASE_UNITS = 12000
+RENDER_UNITS_PER_NODE = 1200
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, cpu_seconds: float, spent: float):
+        super().__init__(f"Presupuesto de CPU agotado: {spent:.2f}s de {cpu_seconds:.2f}s")
+        self.cpu_seconds = cpu_seconds
+        self.spent = spent
+
+    def __reduce__(self):
+        # Se reconstruye con sus argumentos al volver de un shard
+        return (QueryBudgetExceeded, (self.cpu_seconds, self.spent))
+
+
+class QueryRejected(Exception):
+    """
+    La consulta no se admite (status 422: demasiado cara o presupuesto
+    agotado; status 429: demasiadas consultas de su clase en curso).
+    """
+    def __init__(self, status: int, message: str, estimate: "CostEstimate"):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.estimate = estimate
+
+
+class QueryBudget:
+    """
+    Presupuesto de tiempo de CPU de una consulta, medido en el hilo que la
+    ejecuta. Los bucles de búsqueda llaman a check() y la consulta se
+    cancela con QueryBudgetExceeded al agotarse. El reloj empieza en la
+    primera comprobación, así que el presupuesto se puede enviar a otro
+    proceso (shard) antes de usarse.
+    """
+    # Sólo se consulta el reloj cada CHECK_EVERY llamadas a check()
+    CHECK_EVERY = 256
+
+    def __init__(self, cpu_seconds: float):
+        self.cpu_seconds = cpu_seconds
+        self._start = None
+        self._calls = 0
+
+    def check(self):
+        self._calls += 1
+        if self._start is None:
+            self._start = time.thread_time()
+            return
+        if self._calls % self.CHECK_EVERY:
+            return
+        spent = time.thread_time() - self._start
+        if spent > self.cpu_seconds:
+            raise QueryBudgetExceeded(self.cpu_seconds, spent)
+
+
+class CostEstimate:
+    def __init__(self, endpoint: str, units: float, units_per_second: float, **details):
+        self.endpoint = endpoint
+        self.units = min(units, MAX_UNITS)
+        self.seconds = self.units / units_per_second
+        # La asigna AdmissionController, que conoce el presupuesto del endpoint
+        self.cost_class = None
+        self.details = details
+
+    def to_dict(self) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "units": round(self.units),
+            "estimated_seconds": round(self.seconds, 4),
+            "cost_class": self.cost_class,
+            **self.details
+        }
+
+
+def _paths_units(degree: int, target_degree: int, nodes: int, edges: int,
+                 degree_sq: int, depth: int) -> float:
+    """
+    Trabajo de una búsqueda de caminos simples hasta profundidad `depth`:
+    vecinos examinados por la DFS más los nodos copiados en cada camino
+    producido.
+
+    Se llega a cada nodo por una arista, así que su número esperado de
+    vecinos nuevos es el grado en exceso de la componente, sum(d²)/sum(d) - 1,
+    mayor que el grado medio menos uno cuando los grados son desiguales.
+    Cada vecino examinado es el destino con probabilidad
+    target_degree / (2 * edges), y casi todos los caminos tienen la
+    longitud máxima.
+    """
+    if depth < 1 or edges == 0:
+        return 1.0
+    branching = max(1.0, degree_sq / (2 * edges) - 1)
+    # Nodos de los niveles 1..depth-1, cada uno examina sus branching + 1 vecinos
+    levels = depth - 1
+    if branching == 1.0:
+        tree = levels
+    elif levels * math.log(branching) > math.log(MAX_UNITS):
+        return MAX_UNITS
+    else:
+        tree = (branching ** levels - 1) / (branching - 1)
+    scans = max(degree, 1) * (1 + (branching + 1) * tree)
+    hit = min(1.0, target_degree / (2 * edges))
+    return min(scans * (1 + hit * (depth + 1)), MAX_UNITS)
+
+
+class QueryCostEstimator:
+    """
+    Estima el trabajo de cada consulta del grafo a partir del tamaño de la
+    componente, el grado y el cutoff pedido, sin ejecutarla.
+    """
+    def __init__(self, graph, units_per_second: float):
+        self.graph = graph
+        self.units_per_second = units_per_second
+
+    def _estimate(self, endpoint: str, units: float, **details) -> CostEstimate:
+        return CostEstimate(endpoint, units, self.units_per_second, **details)
+
+    def linear(self, endpoint: str) -> CostEstimate:
+        """
+        Consultas que recorren el grafo completo una vez (clusters, estadísticas...).
+        """
+        return self._estimate(endpoint, self.graph.number_of_nodes() + self.graph.number_of_edges())
+
+    def shortest_path(self, w1: str, w2: str) -> CostEstimate:
+        # Los ids de componente son locales a cada shard, pero ninguna arista
+        # une palabras de distinta longitud: no hay camino y no se recorre nada
+        if len(w1) != len(w2):
+            return self._estimate("shortest-path", 1)
+        p1 = self.graph.component_profile(w1)
+        p2 = self.graph.component_profile(w2)
+        if p1 is None or p2 is None:
+            return self._estimate("shortest-path", 1)
+        # La BFS bidireccional termina al agotar la componente más pequeña
+        units = min(p1["nodes"] + p1["edges"], p2["nodes"] + p2["edges"])
+        return self._estimate("shortest-path", units, component_size=p1["nodes"])
+
+    def all_paths(self, w1: str, w2: str, cutoff: Optional[int]) -> CostEstimate:
+        if len(w1) != len(w2):
+            return self._estimate("all-paths", 1, same_component=False)
+        p1 = self.graph.component_profile(w1)
+        p2 = self.graph.component_profile(w2)
+        if p1 is None or p2 is None or p1["component"] != p2["component"]:
+            return self._estimate("all-paths", 1, same_component=False)
+        if w1 == w2:
+            return self._estimate("all-paths", 1, component_size=p1["nodes"])
+        depth = p1["nodes"] - 1 if cutoff is None else min(cutoff, p1["nodes"] - 1)
+        units = _paths_units(p1["degree"], p2["degree"], p1["nodes"], p1["edges"], p1["degree_sq"], depth)
+        return self._estimate("all-paths", units, component_size=p1["nodes"],
+                              degree=p1["degree"], depth=depth)
+
+    def render(self, nodes: int) -> CostEstimate:
+        """
+        Dibujo de una red ego de `nodes` nodos (ya acotada por RENDER_MAX_NODES).
+        """
+        return self._estimate("render", RENDER_BASE_UNITS + RENDER_UNITS_PER_NODE * nodes, nodes=nodes)
+
+    def max_distance(self) -> CostEstimate:
+        # Caminos simples entre cada par de nodos de cada componente
+        units = 0.0
+        for nodes, edges, degree_sq in self.graph.component_sizes():
+            if nodes < 2:
+                continue
+            pairs = nodes * (nodes - 1) / 2
+            degree = 2 * edges / nodes
+            units = min(units + pairs * _paths_units(degree, degree, nodes, edges, degree_sq, nodes - 1), MAX_UNITS)
+        return self._estimate("max-distance", units)
+
+
+class AdmissionController:
+    """
+    Control de admisión: rechaza las consultas cuya estimación supera el
+    presupuesto de CPU de su endpoint y limita cuántas de cada clase de
+    coste se ejecutan a la vez en este proceso.
+    """
+    def __init__(self, budgets: Dict[str, float], concurrency: Dict[str, int]):
+        self.budgets = budgets
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in concurrency.items()}
+
+    def budget_for(self, endpoint: str) -> float:
+        return self.budgets.get(endpoint, self.budgets["default"])
+
+    def classify(self, estimate: CostEstimate) -> str:
+        fraction = estimate.seconds / self.budget_for(estimate.endpoint)
+        return next(name for name, limit in COST_CLASSES if fraction < limit)
+
+    @contextmanager
+    def admit(self, estimate: CostEstimate):
+        """
+        Reserva un hueco para la consulta y retorna su QueryBudget.
+        Lanza QueryRejected si no se admite o si agota el presupuesto.
+        """
+        cpu_seconds = self.budget_for(estimate.endpoint)
+        estimate.cost_class = self.classify(estimate)
+        if estimate.seconds > cpu_seconds:
+            raise QueryRejected(422, f"Consulta demasiado costosa: se estiman {estimate.seconds:.2f}s "
+                                     f"de CPU y el límite es {cpu_seconds:.2f}s.", estimate)
+        slots = self._slots.get(estimate.cost_class)
+        if slots is not None and not slots.acquire(blocking=False):
+            raise QueryRejected(429, f"Demasiadas consultas de coste '{estimate.cost_class}' en curso.", estimate)
+        try:
+            yield QueryBudget(cpu_seconds)
+        except QueryBudgetExceeded as e:
+            raise QueryRejected(422, str(e), estimate)
+        finally:
+            if slots is not None:
+                slots.release()
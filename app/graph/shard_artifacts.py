@@ -0,0 +1,149 @@
+# graph/shard_artifacts.py
+#
+# Artefactos del modo con shards: un grafo serializado por longitud de
+# palabra (graph_{n}.pkl) y un manifest.json con sus tamaños y hashes. El
+# proceso principal sólo lee el manifest; cada shard carga de disco los
+# artefactos de sus longitudes.
+
+import os
+import json
+import pickle
+import hashlib
+from typing import Dict, Iterable
+
+import networkx as nx
+
+from .graph_store import GraphValidationError
+
+MANIFEST_NAME = "manifest.json"
+
+# Campos obligatorios de la entrada de cada longitud en el manifest
+ENTRY_KEYS = {"file", "nodes", "edges", "sha256"}
+
+
+def artifact_name(length: int) -> str:
+    return f"graph_{length}.pkl"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes):
+    # Se escribe en un temporal y se renombra: nadie lee un fichero a medias
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_length_artifact(g: nx.Graph, directory: str, length: int) -> dict:
+    """
+    Serializa el subgrafo de las palabras de longitud `length` y retorna su
+    entrada del manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    data = pickle.dumps(g)
+    _write_atomic(os.path.join(directory, artifact_name(length)), data)
+    return {
+        "file": artifact_name(length),
+        "nodes": g.number_of_nodes(),
+        "edges": g.number_of_edges(),
+        "sha256": hashlib.sha256(data).hexdigest()
+    }
+
+
+def write_manifest(directory: str, entries: Dict[int, dict], meta: dict = None):
+    """
+    Publica el manifest con las entradas de cada longitud. Se escribe el
+    último, de modo que quien lo lea encuentra ya todos sus artefactos; los
+    artefactos de longitudes que ya no existen se borran después.
+    """
+    manifest = {
+        "lengths": {str(length): entry for length, entry in sorted(entries.items())},
+        "nodes": sum(entry["nodes"] for entry in entries.values()),
+        "edges": sum(entry["edges"] for entry in entries.values()),
+        "meta": meta or {}
+    }
+    _write_atomic(os.path.join(directory, MANIFEST_NAME),
+                  json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+    current = {entry["file"] for entry in entries.values()}
+    for file_name in os.listdir(directory):
+        if file_name.startswith("graph_") and file_name.endswith(".pkl") and file_name not in current:
+            os.remove(os.path.join(directory, file_name))
+
+
+def write_shard_artifacts(g: nx.Graph, directory: str):
+    """
+    Reparte un grafo completo en artefactos por longitud y publica el manifest.
+    La centralidad guardada en el grafo se reparte con sus palabras.
+    """
+    by_length: Dict[int, list] = {}
+    for node in g.nodes:
+        by_length.setdefault(len(node.word), []).append(node)
+    scores = g.graph.get("betweenness")
+    meta = {key: value for key, value in g.graph.items() if key != "betweenness"}
+
+    entries = {}
+    for length, nodes in sorted(by_length.items()):
+        subgraph = nx.Graph(g.subgraph(nodes))
+        subgraph.graph = dict(meta)
+        if scores is not None:
+            subgraph.graph["betweenness"] = {
+                word: score for word, score in scores.items() if len(word) == length
+            }
+        entries[length] = write_length_artifact(subgraph, directory, length)
+    write_manifest(directory, entries, meta)
+
+
+def read_manifest(path: str):
+    """
+    Lee y valida el manifest. Retorna (manifest, versión); la versión es el
+    hash del propio manifest, que a su vez incluye el de cada artefacto.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    version = hashlib.sha256(data).hexdigest()[:12]
+    try:
+        manifest = json.loads(data)
+        lengths = {int(length): entry for length, entry in manifest["lengths"].items()}
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise GraphValidationError(f"Manifest de shards no válido en {path}: {e}")
+    for length, entry in lengths.items():
+        missing = ENTRY_KEYS - set(entry)
+        if missing:
+            raise GraphValidationError(f"Entrada de longitud {length} incompleta en {path}: faltan {sorted(missing)}")
+    if not lengths:
+        raise GraphValidationError(f"El manifest {path} no contiene ninguna longitud.")
+    manifest["lengths"] = lengths
+    return manifest, version
+
+
+def load_lengths(directory: str, manifest: dict, lengths: Iterable[int]) -> nx.Graph:
+    """
+    Carga y une los artefactos de `lengths`, comprobando que coinciden con
+    el hash del manifest.
+    """
+    g = nx.Graph()
+    g.graph.update(manifest.get("meta", {}))
+    scores = None
+    for length in lengths:
+        entry = manifest["lengths"][length]
+        path = os.path.join(directory, entry["file"])
+        if _file_sha256(path) != entry["sha256"]:
+            raise GraphValidationError(f"{path} no coincide con el manifest; vuelva a generarlo.")
+        with open(path, 'rb') as f:
+            part = pickle.load(f)
+        g.add_nodes_from(part.nodes)
+        g.add_edges_from(part.edges)
+        if "betweenness" in part.graph:
+            scores = scores or {}
+            scores.update(part.graph["betweenness"])
+        del part
+    if scores is not None:
+        g.graph["betweenness"] = scores
+    return g
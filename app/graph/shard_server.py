@@ -0,0 +1,138 @@
+# graph/shard_server.py
+#
+# Proceso de un shard: carga de disco los artefactos de sus longitudes de
+# palabra y atiende consultas en un socket Unix que comparten todos los
+# procesos de la API del host. Cada conexión se atiende en su propio hilo y
+# el proceso termina cuando lleva un tiempo sin ninguna conexión abierta.
+# Se lanza desde ShardedGraph con:
+#   python -m graph.shard_server <manifest> <versión> <longitudes> <socket> <authkey> <inactividad>
+
+import os
+import sys
+import time
+import pickle
+import logging
+import threading
+from multiprocessing.connection import Connection, Listener
+
+from .graph import Graph
+from .graph_store import validate_graph
+from .shard_artifacts import read_manifest, load_lengths
+
+logger = logging.getLogger(__name__)
+
+# Métodos de Graph que el proceso principal puede invocar en un shard
+SHARD_METHODS = {
+    "shortest_path", "all_paths", "max_distance_path", "clusters",
+    "high_connectivity_nodes", "get_isolated_nodes", "get_node_degree",
+    "get_node_connectivity", "central_nodes", "ego_network",
+    "component_profile", "component_sizes"
+}
+
+
+def serve(conn: Connection, graph: Graph):
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        method, args = message
+        try:
+            if method == "ping":
+                reply = ("ok", os.getpid())
+            elif method not in SHARD_METHODS:
+                raise ValueError(f"Método no permitido en un shard: {method}")
+            else:
+                reply = ("ok", getattr(graph, method)(*args))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            conn.send(("error", RuntimeError(f"Respuesta no serializable del shard: {e}")))
+        except OSError:
+            break
+    conn.close()
+
+
+class ShardServer:
+    """
+    Acepta conexiones de los procesos de la API y lleva la cuenta de las
+    abiertas para terminar tras `idle_seconds` sin ninguna.
+    """
+    def __init__(self, graph: Graph, address: str, authkey: bytes, idle_seconds: float):
+        self.graph = graph
+        self.address = address
+        self.idle_seconds = idle_seconds
+        self._clients = 0
+        self._idle_since = time.monotonic()
+        self._lock = threading.Lock()
+        # El socket se crea al final de la carga: un cliente que conecta
+        # encuentra siempre el shard listo para responder
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+
+    def _handle(self, conn: Connection):
+        try:
+            serve(conn, self.graph)
+        finally:
+            with self._lock:
+                self._clients -= 1
+                self._idle_since = time.monotonic()
+
+    def _watch_idle(self):
+        while True:
+            time.sleep(1)
+            with self._lock:
+                idle = self._clients == 0 and time.monotonic() - self._idle_since > self.idle_seconds
+            if idle:
+                logger.info(f"Shard {self.address} sin clientes durante {self.idle_seconds:.0f}s, terminando.")
+                self._shutdown()
+
+    def _shutdown(self):
+        try:
+            os.unlink(self.address)
+        except OSError:
+            pass
+        os._exit(0)
+
+    def run(self):
+        threading.Thread(target=self._watch_idle, name="shard-idle", daemon=True).start()
+        while True:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                # Cliente sin la clave correcta o que cierra durante el saludo
+                logger.warning(f"Conexión rechazada en {self.address}: {e}")
+                continue
+            with self._lock:
+                self._clients += 1
+            threading.Thread(target=self._handle, args=(conn,), name="shard-conn", daemon=True).start()
+
+
+def main():
+    manifest_path, version, lengths, address, authkey_path, idle_seconds = sys.argv[1:7]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    lengths = [int(length) for length in lengths.split(",")]
+
+    manifest, current = read_manifest(manifest_path)
+    if current != version:
+        sys.exit(f"El manifest {manifest_path} ha cambiado (versión {current}, se esperaba {version}).")
+    g = load_lengths(os.path.dirname(manifest_path), manifest, lengths)
+    validate_graph(g)
+    graph = Graph()
+    graph.graph = g
+    # Índice de componentes antes de aceptar consultas, que llegan en varios hilos
+    graph.component_sizes()
+    with open(authkey_path, 'rb') as f:
+        authkey = f.read()
+
+    server = ShardServer(graph, address, authkey, float(idle_seconds))
+    logger.info(f"Shard de longitudes {lengths} (versión {version}) listo en {address}: "
+                f"{g.number_of_nodes()} nodos, {g.number_of_edges()} aristas.")
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
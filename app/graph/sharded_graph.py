@@ -0,0 +1,480 @@
+# graph/sharded_graph.py
+
+import os
+import sys
+import time
+import fcntl
+import heapq
+import logging
+import hashlib
+import threading
+import subprocess
+from typing import Dict, List
+from multiprocessing.connection import Client
+
+import networkx as nx
+
+from .node import Node
+from .query_cost import QueryBudget, QueryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+# Directorio app/, desde el que se importa el paquete graph en los shards
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos máximos que se espera a que un shard cargue sus artefactos
+SHARD_START_TIMEOUT = 300
+
+# Log de los shards. No heredan la salida de quien los arranca: viven más
+# que él y mantendrían abierta su tubería
+SHARD_LOG = os.path.join(APP_DIR, "shard_server.log")
+
+
+class ShardUnavailableError(Exception):
+    pass
+
+
+class _ShardDiedError(ShardUnavailableError):
+    """
+    La conexión con el shard se ha cerrado: el proceso ha muerto.
+    """
+
+
+class _FileLock:
+    """
+    Cerrojo entre procesos del host (flock) sobre `path`.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+def _authkey(run_dir: str) -> bytes:
+    """
+    Clave compartida por los shards y los procesos de la API de este host,
+    en un fichero sólo legible por el usuario. Se crea la primera vez.
+    """
+    os.makedirs(run_dir, mode=0o700, exist_ok=True)
+    path = os.path.join(run_dir, "authkey")
+    with _FileLock(os.path.join(run_dir, "authkey.lock")):
+        if not os.path.exists(path):
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(os.urandom(32))
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class Shard:
+    """
+    Proceso que posee los subgrafos de una o varias longitudes de palabra.
+    Escucha en un socket Unix propio de la versión y de sus longitudes, así
+    que todos los procesos de la API del host comparten el mismo shard: el
+    primero que lo necesita lo arranca y los demás se conectan.
+
+    Cada proceso de la API usa hasta `pool_size` conexiones a la vez con el
+    shard, que atiende cada una en su propio hilo: una consulta larga no
+    bloquea a las demás. Si el shard ha muerto se arranca de nuevo y la
+    consulta se repite una vez; las consultas no modifican el grafo.
+    """
+    def __init__(self, shard_id: int, lengths: List[int], number_of_nodes: int, number_of_edges: int,
+                 manifest_path: str, version: str, run_dir: str, authkey: bytes, idle_seconds: float,
+                 pool_size: int, timeout: float):
+        self.shard_id = shard_id
+        self.lengths = lengths
+        self.number_of_nodes = number_of_nodes
+        self.number_of_edges = number_of_edges
+        self.manifest_path = manifest_path
+        self.version = version
+        self.run_dir = run_dir
+        self.authkey = authkey
+        self.idle_seconds = idle_seconds
+        self.pool_size = pool_size
+        self.timeout = timeout
+        tag = hashlib.sha1(",".join(map(str, lengths)).encode('ascii')).hexdigest()[:8]
+        self.address = os.path.join(run_dir, f"{version}-{tag}.sock")
+        self.restarts = 0
+        self._idle = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._restarting = False
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def __str__(self):
+        return f"Shard {self.shard_id} {self.lengths}"
+
+    def _connect(self):
+        return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+
+    def start(self):
+        """
+        Conecta con el shard y lo arranca si no hay ninguno escuchando. La
+        conexión queda abierta en el pool: mientras exista, el shard no
+        termina por inactividad.
+        """
+        conn = self._connect_or_spawn()
+        self._checkin(conn)
+
+    def _connect_or_spawn(self):
+        # El cerrojo de fichero evita que dos procesos lo arranquen a la vez
+        with _FileLock(self.address + ".lock"):
+            try:
+                return self._connect()
+            except OSError:
+                return self._spawn()
+
+    def _spawn(self):
+        # Socket de un shard anterior que terminó sin borrarlo
+        try:
+            os.unlink(self.address)
+        except FileNotFoundError:
+            pass
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))
+        with open(SHARD_LOG, 'ab') as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "graph.shard_server", self.manifest_path, self.version,
+                 ",".join(map(str, self.lengths)), self.address, os.path.join(self.run_dir, "authkey"),
+                 str(self.idle_seconds)],
+                cwd=APP_DIR, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                # Sesión propia: el shard es del host, no de este proceso
+                start_new_session=True
+            )
+        threading.Thread(target=process.wait, name=f"shard-{self.shard_id}-wait", daemon=True).start()
+        deadline = time.monotonic() + SHARD_START_TIMEOUT
+        while True:
+            try:
+                conn = self._connect()
+                logger.info(f"{self} iniciado (pid {process.pid}).")
+                return conn
+            except OSError:
+                pass
+            if process.poll() is not None:
+                raise ShardUnavailableError(f"{self} terminó al cargar (código {process.returncode}); "
+                                            f"ver {SHARD_LOG}.")
+            if time.monotonic() > deadline:
+                process.kill()
+                raise ShardUnavailableError(f"{self} no arrancó en {SHARD_START_TIMEOUT}s.")
+            time.sleep(0.1)
+
+    def restart(self):
+        """
+        Vuelve a arrancar el shard si ha muerto y descarta las conexiones
+        con el proceso anterior. Si otro hilo o proceso ya lo ha arrancado,
+        sólo se conecta.
+        """
+        with self._restart_lock:
+            with self._lock:
+                stale, self._idle = self._idle, []
+            for conn in stale:
+                conn.close()
+            with _FileLock(self.address + ".lock"):
+                try:
+                    conn = self._connect()
+                except OSError:
+                    logger.warning(f"{self} no responde; arrancándolo de nuevo.")
+                    self.restarts += 1
+                    conn = self._spawn()
+            self._checkin(conn)
+
+    def restart_async(self):
+        """
+        Lanza restart() en segundo plano si no hay ya uno en curso.
+        """
+        with self._lock:
+            if self._restarting or self._closed:
+                return
+            self._restarting = True
+
+        def run():
+            try:
+                self.restart()
+            except Exception as e:
+                logger.error(f"No se pudo reiniciar {self}: {e}")
+            finally:
+                with self._lock:
+                    self._restarting = False
+
+        threading.Thread(target=run, name=f"shard-{self.shard_id}-restart", daemon=True).start()
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return self._connect()
+        except OSError as e:
+            raise _ShardDiedError(f"{self} no disponible: {e}")
+
+    def _checkin(self, conn):
+        with self._lock:
+            if not self._closed:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _call_once(self, method: str, args: tuple):
+        conn = self._checkout()
+        try:
+            conn.send((method, args))
+            if not conn.poll(self.timeout):
+                # El shard cancela la consulta al agotar su presupuesto; la
+                # respuesta, si llega, ya no tiene a quién entregarse
+                conn.close()
+                raise ShardUnavailableError(f"{self} no respondió a {method} en {self.timeout:g}s.")
+            status, result = conn.recv()
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise _ShardDiedError(f"{self} no disponible: {e}")
+        self._checkin(conn)
+        if status == "error":
+            raise result
+        return result
+
+    def call(self, method: str, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ShardUnavailableError(f"{self} saturado: {self.pool_size} consultas en curso.")
+        try:
+            try:
+                return self._call_once(method, args)
+            except _ShardDiedError:
+                self.restart()
+                return self._call_once(method, args)
+        finally:
+            self._slots.release()
+
+    def health(self, timeout: float = 2) -> dict:
+        """
+        Comprueba con una conexión aparte, sin esperar a las del pool, que
+        el shard responde. Si no, lo reinicia en segundo plano.
+        """
+        alive = False
+        try:
+            conn = self._connect()
+            try:
+                conn.send(("ping", ()))
+                alive = conn.poll(timeout) and conn.recv()[0] == "ok"
+            finally:
+                conn.close()
+        except (EOFError, OSError):
+            pass
+        if not alive:
+            self.restart_async()
+        with self._lock:
+            restarting = self._restarting
+        return {"shard": self.shard_id, "lengths": self.lengths, "alive": alive,
+                "restarting": restarting, "restarts": self.restarts}
+
+    def close(self):
+        # Sólo se cierran las conexiones de este proceso: el shard termina
+        # solo cuando ningún proceso de la API lo usa
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.send(None)
+                conn.close()
+            except OSError:
+                pass
+
+
+def partition_lengths(sizes: Dict[int, int], shards: int) -> List[List[int]]:
+    """
+    Reparte las longitudes de palabra entre `shards` procesos equilibrando
+    el tamaño (nodos + aristas): cada longitud, de mayor a menor, va al
+    shard menos cargado. Nunca se crean shards vacíos.
+    """
+    shards = max(1, min(shards, len(sizes)))
+    heap = [(0, i) for i in range(shards)]
+    groups = [[] for _ in range(shards)]
+    for length in sorted(sizes, key=lambda l: (-sizes[l], l)):
+        load, i = heapq.heappop(heap)
+        groups[i].append(length)
+        heapq.heappush(heap, (load + sizes[length], i))
+    return [sorted(group) for group in groups]
+
+
+class ShardedGraph:
+    """
+    Misma interfaz de consulta que Graph, pero con el grafo repartido por
+    longitud de palabra entre procesos. Ninguna arista cruza longitudes, así
+    que cada consulta de una palabra o de un par de la misma longitud la
+    responde un único shard; los pares de longitudes distintas no tienen
+    camino y se responden sin contactar ningún shard. Las consultas globales
+    combinan los resultados de todos los shards.
+
+    Este proceso sólo lee el manifest (ver shard_artifacts): conserva el
+    mapa longitud -> shard y los totales, y cada shard carga de disco sus
+    propios artefactos.
+
+    Requiere un sistema tipo Unix (sockets Unix y flock).
+    """
+    def __init__(self, manifest_path: str, manifest: dict, version: str, shards: int,
+                 run_dir: str, idle_seconds: float = 60, pool_size: int = 8, timeout: float = 30):
+        entries = manifest["lengths"]
+        sizes = {length: entry["nodes"] + entry["edges"] for length, entry in entries.items()}
+        self.meta = manifest.get("meta", {})
+        self._number_of_nodes = manifest["nodes"]
+        self._number_of_edges = manifest["edges"]
+        authkey = _authkey(run_dir)
+        self._shards: List[Shard] = []
+        self._by_length: Dict[int, Shard] = {}
+        for shard_id, lengths in enumerate(partition_lengths(sizes, shards)):
+            shard = Shard(shard_id, lengths,
+                          sum(entries[length]["nodes"] for length in lengths),
+                          sum(entries[length]["edges"] for length in lengths),
+                          manifest_path, version, run_dir, authkey, idle_seconds, pool_size, timeout)
+            self._shards.append(shard)
+            for length in lengths:
+                self._by_length[length] = shard
+
+        # Los shards cargan en paralelo, cada uno en su proceso
+        errors = []
+
+        def start(shard):
+            try:
+                shard.start()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=start, args=(shard,)) for shard in self._shards]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            self.close()
+            raise errors[0]
+        for shard in self._shards:
+            logger.info(f"Shard {shard.shard_id} con longitudes {shard.lengths}: "
+                        f"{shard.number_of_nodes} nodos, {shard.number_of_edges} aristas.")
+
+    def _shard_for(self, word: str):
+        return self._by_length.get(len(word))
+
+    def _call_all(self, method: str, *args) -> list:
+        return [shard.call(method, *args) for shard in self._shards]
+
+    def number_of_nodes(self) -> int:
+        return self._number_of_nodes
+
+    def number_of_edges(self) -> int:
+        return self._number_of_edges
+
+    def shortest_path(self, w1: str, w2: str):
+        shard = self._shard_for(w1)
+        if len(w1) != len(w2):
+            raise nx.NetworkXNoPath(f"No hay camino entre palabras de distinta longitud: {w1}, {w2}")
+        if shard is None:
+            raise nx.NodeNotFound(f"Source {Node(w1)} is not in G")
+        return shard.call("shortest_path", w1, w2)
+
+    def all_paths(self, w1: str, w2: str, cutoff: int = None, budget=None):
+        shard = self._shard_for(w1)
+        if len(w1) != len(w2) or shard is None:
+            return []
+        # El presupuesto viaja sin empezar y se mide en el proceso del shard
+        return shard.call("all_paths", w1, w2, cutoff, budget)
+
+    def max_distance_path(self, budget=None):
+        if budget is None:
+            return max(self._call_all("max_distance_path"), key=len, default=[])
+        # Cada shard mide su propio presupuesto y se consultan uno tras otro:
+        # cada uno recibe lo que queda del total, de modo que la suma no lo
+        # supera. Se descuenta el tiempo real de cada llamada, una cota
+        # superior de la CPU que ha usado el shard
+        remaining = budget.cpu_seconds
+        longest = []
+        for shard in self._shards:
+            if remaining <= 0:
+                raise QueryBudgetExceeded(budget.cpu_seconds, budget.cpu_seconds - remaining)
+            start = time.perf_counter()
+            try:
+                path = shard.call("max_distance_path", QueryBudget(remaining))
+            except QueryBudgetExceeded as e:
+                raise QueryBudgetExceeded(budget.cpu_seconds, budget.cpu_seconds - remaining + e.spent)
+            remaining -= time.perf_counter() - start
+            if len(path) > len(longest):
+                longest = path
+        return longest
+
+    def component_profile(self, word: str):
+        shard = self._shard_for(word)
+        if shard is None:
+            return None
+        # Los ids de componente son locales al shard, pero dos palabras de la
+        # misma longitud siempre están en el mismo shard
+        return shard.call("component_profile", word)
+
+    def component_sizes(self):
+        return [size for result in self._call_all("component_sizes") for size in result]
+
+    def clusters(self):
+        return [cluster for result in self._call_all("clusters") for cluster in result]
+
+    def high_connectivity_nodes(self, threshold: int):
+        return [node for result in self._call_all("high_connectivity_nodes", threshold) for node in result]
+
+    def get_isolated_nodes(self):
+        return [node for result in self._call_all("get_isolated_nodes") for node in result]
+
+    def get_node_degree(self, word: str) -> int:
+        shard = self._shard_for(word)
+        if shard is None:
+            return 0
+        return shard.call("get_node_degree", word)
+
+    def get_graph_density(self) -> float:
+        n = self._number_of_nodes
+        if n <= 1:
+            return 0
+        return 2 * self._number_of_edges / (n * (n - 1))
+
+    def get_node_connectivity(self) -> int:
+        # Con más de una longitud de palabra el grafo no es conexo
+        if len(self._by_length) > 1:
+            return 0
+        return self._shards[0].call("get_node_connectivity") if self._shards else 0
+
+    def central_nodes(self, top: int):
+        results = [result for result in self._call_all("central_nodes", top) if result is not None]
+        if not results:
+            return None
+        return heapq.nlargest(top, (item for result in results for item in result), key=lambda item: item[1])
+
+    def centrality_meta(self) -> dict:
+        return self.meta.get("betweenness_meta", {})
+
+    def ego_network(self, word: str, radius: int, max_nodes: int):
+        shard = self._shard_for(word)
+        if shard is None:
+            return None, {}
+        return shard.call("ego_network", word, radius, max_nodes)
+
+    def shard_info(self) -> list:
+        return [
+            {"shard": s.shard_id, "lengths": s.lengths,
+             "nodes": s.number_of_nodes, "edges": s.number_of_edges}
+            for s in self._shards
+        ]
+
+    def shard_health(self) -> list:
+        return [shard.health() for shard in self._shards]
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+
+    def __repr__(self):
+        return (f"ShardedGraph with {self._number_of_nodes} nodes and {self._number_of_edges} edges "
+                f"in {len(self._shards)} shards.")
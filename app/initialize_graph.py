@@ -4,9 +4,13 @@ import os
 import sys
 import pickle
 import logging
+import argparse
+import networkx as nx
 from graph.graph import Graph
+from graph.shard_artifacts import write_length_artifact, write_manifest, write_shard_artifacts
+from packed_words import load_datamart_words
 
-from config import DATA_MART_PATH
+from config import DATA_MART_PATH, GRAPH_PATH, GRAPH_SHARD_DIR
 
 # Configurar logging
 logging.basicConfig(
@@ -19,45 +23,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def write_graph(g: nx.Graph, path: str):
+    # Se escribe en un fichero temporal y se renombra, para que una API en
+    # marcha nunca lea un artefacto a medio escribir.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(g, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Grafo serializado en {path}")
+
 def main():
-    graph = Graph()
+    parser = argparse.ArgumentParser(
+        description="Construye el grafo de palabras y lo serializa: completo en graph.pkl "
+                    "y por longitud de palabra para el modo con shards."
+    )
+    parser.add_argument("--shards-only", action="store_true",
+                        help="Sólo los artefactos por longitud: nunca se tiene el grafo completo en memoria")
+    parser.add_argument("--from-graph", action="store_true",
+                        help="No reconstruye: reparte por longitud el graph.pkl existente")
+    args = parser.parse_args()
+
     try:
-        logger.info("Iniciando construcción del grafo")
-        all_words = set()
-        for file_name in os.listdir(DATA_MART_PATH):
-            if file_name.startswith("words_") and file_name.endswith(".txt"):
-                file_path = os.path.join(DATA_MART_PATH, file_name)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        w = line.strip()
-                        if w:
-                            all_words.add(w)
+        if args.from_graph:
+            with open(GRAPH_PATH, 'rb') as f:
+                write_shard_artifacts(pickle.load(f), GRAPH_SHARD_DIR)
+            logger.info(f"Artefactos por longitud escritos en {GRAPH_SHARD_DIR}")
+            return
 
-        if not all_words:
+        logger.info("Iniciando construcción del grafo")
+        # Formato binario si está disponible, texto como alternativa
+        words_by_length = load_datamart_words(DATA_MART_PATH)
+        if not any(words_by_length.values()):
             logger.warning("No se encontraron palabras en datamart.")
             return
 
-        # Construir el grafo
-        for w in all_words:
-            graph.add_node(w)
-
-        # Añadir edges
-        all_words_list = list(all_words)
-        total_edges = 0
-        for i in range(len(all_words_list)):
-            for j in range(i + 1, len(all_words_list)):
-                w1 = all_words_list[i]
-                w2 = all_words_list[j]
-                if graph.add_edge(w1, w2):
-                    total_edges += 1
+        # Ninguna arista une palabras de distinta longitud: cada longitud se
+        # construye y se serializa por separado
+        full = None if args.shards_only else nx.Graph()
+        entries = {}
+        total_nodes = total_edges = 0
+        for length, words in sorted(words_by_length.items()):
+            words = list(set(words))
+            if not words:
+                continue
+            graph = Graph()
+            for w in words:
+                graph.add_node(w)
+            for i in range(len(words)):
+                for j in range(i + 1, len(words)):
+                    graph.add_edge(words[i], words[j])
+            entries[length] = write_length_artifact(graph.graph, GRAPH_SHARD_DIR, length)
+            total_nodes += graph.number_of_nodes()
+            total_edges += graph.number_of_edges()
+            if full is not None:
+                full.add_nodes_from(graph.graph.nodes)
+                full.add_edges_from(graph.graph.edges)
 
-        logger.info(f"Grafo construido exitosamente: {len(graph.graph.nodes)} nodos, {len(graph.graph.edges)} aristas.")
+        logger.info(f"Grafo construido exitosamente: {total_nodes} nodos, {total_edges} aristas.")
 
-        # Serializar el grafo
-        serialized_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graph.pkl')
-        with open(serialized_path, 'wb') as f:
-            pickle.dump(graph.graph, f)
-        logger.info(f"Grafo serializado en {serialized_path}")
+        write_manifest(GRAPH_SHARD_DIR, entries)
+        logger.info(f"Artefactos por longitud escritos en {GRAPH_SHARD_DIR}")
+        if full is not None:
+            write_graph(full, GRAPH_PATH)
 
     except Exception as e:
         logger.error(f"Error al construir y serializar el grafo: {e}", exc_info=True)
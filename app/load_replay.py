@@ -0,0 +1,322 @@
+# load_replay.py
+#
+# Reproduce carga HTTP contra la API: a partir de un access log (werkzeug o
+# nginx) o de una mezcla sintética de consultas, a un ritmo y concurrencia
+# dados, y genera un informe JSON comparable entre ejecuciones.
+#
+#   python load_replay.py --log ../app.log --rate 50 --concurrency 8
+#   python load_replay.py --synthetic 2000 --url http://127.0.0.1:5001 --output after.json --compare before.json
+
+import re
+import sys
+import math
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit, quote
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import DATA_MART_PATH
+
+# Petición en una línea de access log: "GET /ruta?query HTTP/1.1" 200
+REQUEST_LINE = re.compile(r'"(GET|POST|PUT|DELETE|HEAD) (\S+) HTTP/[\d.]+" (\d{3})')
+
+DEFAULT_MIX = "shortest-path=5,all-paths=1,clusters=1,node-info=3"
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_access_log(path: str, methods: Optional[Iterable[str]] = ("GET",)) -> List[Tuple[str, str]]:
+    """
+    Extrae (método, ruta con query) de cada línea de petición del log.
+    Por defecto sólo las GET, para no repetir operaciones como /admin/reload;
+    con methods=None se incluyen todas.
+    """
+    allowed = None if methods is None else {m.upper() for m in methods}
+    requests_ = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = REQUEST_LINE.search(line)
+            if match and (allowed is None or match.group(1) in allowed):
+                requests_.append((match.group(1), match.group(2)))
+    return requests_
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        route, _, weight = item.partition("=")
+        weights[route.strip().strip("/")] = float(weight or 1)
+    return weights
+
+
+def synthesize(count: int, mix: str, seed: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    Genera `count` peticiones con la mezcla ponderada `mix` (ruta=peso,...),
+    usando palabras reales de datamart. Los pares de caminos se toman de la
+    misma longitud, como las consultas reales que tienen respuesta.
+    """
+    from packed_words import load_datamart_words
+
+    rng = random.Random(seed)
+    words_by_length = {n: words for n, words in load_datamart_words(DATA_MART_PATH).items() if len(words) > 1}
+    if not words_by_length:
+        raise ValueError(f"No hay palabras en {DATA_MART_PATH} para generar consultas.")
+    lengths = list(words_by_length)
+    length_weights = [len(words_by_length[n]) for n in lengths]
+
+    def pair():
+        words = words_by_length[rng.choices(lengths, length_weights)[0]]
+        return rng.sample(words, 2)
+
+    def word():
+        return pair()[0]
+
+    builders = {
+        "shortest-path": lambda: "/shortest-path?word1={}&word2={}".format(*map(quote, pair())),
+        "all-paths": lambda: "/all-paths?word1={}&word2={}&cutoff={}".format(*map(quote, pair()), rng.randint(2, 4)),
+        "clusters": lambda: "/clusters",
+        "node-info": lambda: f"/node-info?word={quote(word())}",
+        "high-connectivity": lambda: f"/high-connectivity?degree={rng.randint(2, 8)}",
+        "isolated-nodes": lambda: "/isolated-nodes",
+        "graph-stats": lambda: "/graph-stats",
+        "central-nodes": lambda: f"/central-nodes?top={rng.choice([10, 50])}",
+        "render": lambda: f"/render?word={quote(word())}&radius={rng.randint(1, 2)}&format=png",
+    }
+    weights = parse_mix(mix)
+    unknown = set(weights) - set(builders)
+    if unknown:
+        raise ValueError(f"Rutas desconocidas en la mezcla: {sorted(unknown)}")
+    routes = list(weights)
+    chosen = rng.choices(routes, [weights[r] for r in routes], k=count)
+    return [("GET", builders[route]()) for route in chosen]
+
+
+class TestClientTransport:
+    """
+    Envía las peticiones en proceso mediante el test client de Flask,
+    sin red; un cliente por hilo.
+    """
+    name = "test-client"
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.open(path, method=method).status_code
+
+
+class HttpTransport:
+    """
+    Envía las peticiones a un servidor local por HTTP, con una conexión
+    keep-alive por hilo.
+    """
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 60):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method: str, path: str) -> int:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def replay(transport, requests_: List[Tuple[str, str]], rate: float, concurrency: int) -> List[dict]:
+    """
+    Lanza las peticiones con `concurrency` hilos. Con rate > 0 la carga es
+    abierta: cada petición tiene una hora de envío prevista y la latencia se
+    mide desde ella, de modo que la espera por saturación cuenta. Con
+    rate = 0 cada hilo envía la siguiente en cuanto termina la anterior.
+    """
+    results = []
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(concurrency)
+
+    def run(method, path, scheduled):
+        sent = time.perf_counter()
+        try:
+            status = transport.request(method, path)
+            error = None
+        except Exception as e:
+            status, error = 0, f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        start = scheduled if scheduled is not None else sent
+        with lock:
+            results.append({
+                "route": urlsplit(path).path,
+                "status": status,
+                "error": error,
+                "latency": finished - start
+            })
+        slots.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, (method, path) in enumerate(requests_):
+            scheduled = None
+            if rate > 0:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            pool.submit(run, method, path, scheduled)
+    return results
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(results: List[dict], elapsed: float) -> dict:
+    """
+    Agrega los resultados por ruta. Se consideran errores las respuestas 5xx
+    y los fallos de transporte; los 4xx se cuentan aparte en `status`.
+    """
+    def stats(items):
+        latencies = sorted(r["latency"] * 1000 for r in items)
+        errors = sum(1 for r in items if r["status"] == 0 or r["status"] >= 500)
+        status = {}
+        for r in items:
+            status[str(r["status"])] = status.get(str(r["status"]), 0) + 1
+        return {
+            "count": len(items),
+            "throughput_rps": round(len(items) / elapsed, 2) if elapsed > 0 else 0,
+            "errors": errors,
+            "error_rate": round(errors / len(items), 4) if items else 0,
+            "status": dict(sorted(status.items())),
+            "latency_ms": {
+                **{f"p{p}": round(percentile(latencies, p), 2) for p in PERCENTILES},
+                "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0,
+                "max": round(latencies[-1], 2) if latencies else 0
+            }
+        }
+
+    by_route = {}
+    for r in results:
+        by_route.setdefault(r["route"], []).append(r)
+    return {
+        "total": stats(results),
+        "routes": {route: stats(items) for route, items in sorted(by_route.items())}
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """
+    Diferencia relativa (%) de throughput y percentiles frente a otro informe.
+    """
+    def delta(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    diff = {}
+    for route, new in [("total", report["total"]), *report["routes"].items()]:
+        old = baseline["total"] if route == "total" else baseline.get("routes", {}).get(route)
+        if old is None:
+            continue
+        diff[route] = {
+            "throughput_rps": delta(new["throughput_rps"], old["throughput_rps"]),
+            "error_rate": round(new["error_rate"] - old["error_rate"], 4),
+            **{f"p{p}": delta(new["latency_ms"][f"p{p}"], old["latency_ms"][f"p{p}"]) for p in PERCENTILES}
+        }
+    return diff
+
+
+def local_transport(timeout: float = 300):
+    """
+    Importa api.app en este proceso y espera a que el grafo esté cargado.
+    """
+    from api.api import app
+    transport = TestClientTransport(app)
+    deadline = time.monotonic() + timeout
+    while transport.request("GET", "/health/ready") != 200:
+        if time.monotonic() > deadline:
+            raise TimeoutError("La API no ha cargado el grafo a tiempo.")
+        time.sleep(0.2)
+    return transport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce carga HTTP contra la API de grafos.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="Access log de werkzeug o nginx a reproducir")
+    source.add_argument("--synthetic", type=int, metavar="N", help="Genera N peticiones sintéticas")
+    parser.add_argument("--all-methods", action="store_true",
+                        help="Reproduce también las peticiones del log que no son GET (POST /admin/reload...)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Mezcla sintética ruta=peso (por defecto {DEFAULT_MIX})")
+    parser.add_argument("--rate", type=float, default=0, help="Peticiones por segundo (0 = tan rápido como sea posible)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Peticiones simultáneas")
+    parser.add_argument("--repeat", type=int, default=1, help="Veces que se repite la secuencia")
+    parser.add_argument("--url", help="Servidor local, p. ej. http://127.0.0.1:5001 (por defecto, test client en proceso)")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla de la mezcla sintética")
+    parser.add_argument("--output", help="Fichero donde guardar el informe JSON")
+    parser.add_argument("--compare", help="Informe JSON previo con el que comparar")
+    args = parser.parse_args()
+
+    if args.log:
+        requests_ = parse_access_log(args.log, None if args.all_methods else ("GET",))
+    else:
+        requests_ = synthesize(args.synthetic, args.mix, args.seed)
+    requests_ = requests_ * max(1, args.repeat)
+    if not requests_:
+        print("No hay peticiones que reproducir.", file=sys.stderr)
+        sys.exit(1)
+
+    transport = HttpTransport(args.url) if args.url else local_transport()
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    results = replay(transport, requests_, args.rate, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "source": args.log or f"synthetic:{args.mix}",
+            "transport": transport.name,
+            "target_rate": args.rate,
+            "concurrency": args.concurrency,
+            "requests": len(requests_),
+            "duration_seconds": round(elapsed, 3)
+        },
+        **summarize(results, elapsed)
+    }
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report["compare"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
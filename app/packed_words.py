@@ -0,0 +1,201 @@
+# packed_words.py
+
+import os
+import re
+import struct
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Cabecera: magic, versión, longitud de palabra, número de palabras
+HEADER = struct.Struct("<4sHHQ")
+MAGIC = b"WPK1"
+FORMAT_VERSION = 1
+
+FILE_PATTERN = re.compile(r"^words_(\d+)\.(txt|bin)$")
+
+
+class PackedWords:
+    """
+    Conjunto ordenado de palabras de longitud fija n, guardado como un array
+    NumPy `S{n}` (n bytes por palabra, ASCII). En disco es una cabecera de
+    16 bytes seguida del array, de modo que se puede mapear en memoria sin
+    parsear: la pertenencia es una búsqueda binaria y las uniones y
+    diferencias son operaciones vectorizadas sobre arrays ordenados.
+    """
+    def __init__(self, words: np.ndarray, length: int):
+        self.words = words
+        self.length = length
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], length: int) -> "PackedWords":
+        """
+        Construye el conjunto a partir de palabras de exactamente `length` letras ASCII.
+        Lanza ValueError si alguna no cumple.
+        """
+        words = list(words)
+        for w in words:
+            if len(w) != length or not w.isascii():
+                raise ValueError(f"Palabra no empaquetable en longitud {length}: {w!r}")
+        array = np.unique(np.array(words, dtype=f"S{length}")) if words else np.empty(0, dtype=f"S{length}")
+        return cls(array, length)
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "PackedWords":
+        """
+        Abre un fichero .bin. Con mmap=True el array se mapea en memoria y
+        sólo se leen del disco las páginas que se consultan.
+        """
+        with open(path, 'rb') as f:
+            magic, version, length, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Formato de fichero no reconocido: {path}")
+            if not mmap or count == 0:
+                array = np.frombuffer(f.read(count * length), dtype=f"S{length}")
+                return cls(array, length)
+        array = np.memmap(path, dtype=f"S{length}", mode='r', offset=HEADER.size, shape=(count,))
+        return cls(array, length)
+
+    def save(self, path: str):
+        """
+        Escribe el fichero .bin en un temporal y lo renombra.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.length, len(self.words)))
+            f.write(np.ascontiguousarray(self.words).tobytes())
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        if len(word) != self.length or not word.isascii():
+            return False
+        key = word.encode('ascii')
+        i = np.searchsorted(self.words, key)
+        return bool(i < len(self.words) and self.words[i] == key)
+
+    def contains_many(self, words: Iterable[str]) -> np.ndarray:
+        """
+        Pertenencia vectorizada: retorna un array booleano alineado con `words`.
+        """
+        words = list(words)
+        # Igual que __contains__: otra longitud o no ASCII nunca pertenece
+        # (S{n} truncaría las palabras largas y encode fallaría con no ASCII)
+        valid = np.fromiter((len(w) == self.length and w.isascii() for w in words), dtype=bool, count=len(words))
+        found = np.zeros(len(words), dtype=bool)
+        if len(self.words) == 0 or not valid.any():
+            return found
+        query = np.array([w for w, ok in zip(words, valid) if ok], dtype=f"S{self.length}")
+        i = np.minimum(np.searchsorted(self.words, query), len(self.words) - 1)
+        found[valid] = self.words[i] == query
+        return found
+
+    def merge(self, other: "PackedWords") -> "PackedWords":
+        return PackedWords(np.union1d(self.words, other.words), self.length)
+
+    def difference(self, other: "PackedWords") -> "PackedWords":
+        return PackedWords(np.setdiff1d(self.words, other.words, assume_unique=True), self.length)
+
+    def as_matrix(self) -> np.ndarray:
+        """
+        Vista (palabras x n) de uint8 sobre los mismos datos, sin copiar.
+        """
+        return np.ascontiguousarray(self.words).view(np.uint8).reshape(len(self.words), self.length)
+
+    def to_list(self) -> List[str]:
+        return [w.decode('ascii') for w in self.words.tolist()]
+
+
+def text_path(data_mart_path: str, length: int) -> str:
+    return os.path.join(data_mart_path, f"words_{length}.txt")
+
+
+def packed_path(data_mart_path: str, length: int) -> str:
+    return os.path.join(data_mart_path, f"words_{length}.bin")
+
+
+def read_text_words(file_path: str) -> List[str]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [w for w in (line.strip() for line in f) if w]
+
+
+def write_text_words(file_path: str, words: Iterable[str]):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for w in words:
+            f.write(w + "\n")
+
+
+def datamart_lengths(data_mart_path: str) -> List[int]:
+    """
+    Longitudes de palabra presentes en datamart/, en formato binario o de texto.
+    """
+    if not os.path.isdir(data_mart_path):
+        return []
+    lengths = set()
+    for file_name in os.listdir(data_mart_path):
+        match = FILE_PATTERN.match(file_name)
+        if match:
+            lengths.add(int(match.group(1)))
+    return sorted(lengths)
+
+
+def _packed_is_current(data_mart_path: str, length: int) -> bool:
+    """
+    El .bin se usa si existe y no es más antiguo que el .txt; si el .txt se
+    editó después, el texto manda.
+    """
+    bin_file = packed_path(data_mart_path, length)
+    txt_file = text_path(data_mart_path, length)
+    if not os.path.isfile(bin_file):
+        return False
+    return not os.path.isfile(txt_file) or os.path.getmtime(bin_file) >= os.path.getmtime(txt_file)
+
+
+def load_packed(data_mart_path: str, length: int) -> PackedWords:
+    """
+    Palabras de longitud `length` como PackedWords: desde el .bin si está al
+    día, si no desde el .txt, y vacío si no hay ninguno.
+    Lanza ValueError si el .txt contiene palabras no ASCII.
+    """
+    if _packed_is_current(data_mart_path, length):
+        return PackedWords.open(packed_path(data_mart_path, length))
+    txt_file = text_path(data_mart_path, length)
+    if os.path.isfile(txt_file):
+        return PackedWords.from_words(read_text_words(txt_file), length)
+    return PackedWords.from_words([], length)
+
+
+def load_datamart_words(data_mart_path: str) -> Dict[int, List[str]]:
+    """
+    Retorna {longitud: [palabras]} de todo datamart/, leyendo el formato
+    binario cuando está disponible y el texto como alternativa.
+    """
+    words_by_length = {}
+    for length in datamart_lengths(data_mart_path):
+        if _packed_is_current(data_mart_path, length):
+            words_by_length[length] = PackedWords.open(packed_path(data_mart_path, length)).to_list()
+        elif os.path.isfile(text_path(data_mart_path, length)):
+            words_by_length[length] = read_text_words(text_path(data_mart_path, length))
+    return words_by_length
+
+
+def convert_datamart(data_mart_path: str) -> Dict[int, Optional[int]]:
+    """
+    Genera words_{n}.bin a partir de cada words_{n}.txt.
+    Retorna {longitud: número de palabras} o None si el fichero no es empaquetable.
+    """
+    converted = {}
+    for length in datamart_lengths(data_mart_path):
+        txt_file = text_path(data_mart_path, length)
+        if not os.path.isfile(txt_file):
+            continue
+        try:
+            packed = PackedWords.from_words(read_text_words(txt_file), length)
+        except ValueError:
+            converted[length] = None
+            continue
+        packed.save(packed_path(data_mart_path, length))
+        converted[length] = len(packed)
+    return converted
@@ -3,6 +3,7 @@
 import os
 from typing import Dict, Set
 from word_sources.word_source import WordSource
+from packed_words import PackedWords, load_packed, packed_path, read_text_words, write_text_words
 
 class WordManager:
     def __init__(self, word_source: WordSource):
@@ -11,7 +12,8 @@ class WordManager:
     def process_words(self, data_lake_path: str, data_mart_path: str) -> Dict[int, int]:
         """
         1) Guarda los datos crudos en datalake/.
-        2) get_words() => {longitud: set(...)}, y guarda en datamart/ words_{n}.txt sin duplicados.
+        2) get_words() => {longitud: set(...)}, y guarda en datamart/ words_{n}.txt y
+           words_{n}.bin (formato empaquetado, ver packed_words) sin duplicados.
         Retorna {n: num_palabras_nuevas} para cada longitud n.
         """
         new_words_count = {}
@@ -28,17 +30,30 @@ class WordManager:
             file_name = f"words_{length}.txt"
             file_path = os.path.join(data_mart_path, file_name)
 
+            try:
+                # Unión vectorizada sobre el formato binario; el .txt se
+                # escribe antes que el .bin para que éste quede como vigente
+                existing = load_packed(data_mart_path, length)
+                combined = existing.merge(PackedWords.from_words(word_set, length))
+                new_words_count[length] = len(combined) - len(existing)
+                del existing
+                write_text_words(file_path, combined.to_list())
+                combined.save(packed_path(data_mart_path, length))
+                continue
+            except ValueError:
+                # Palabras no ASCII: sólo se mantiene el formato de texto
+                bin_path = packed_path(data_mart_path, length)
+                if os.path.isfile(bin_path):
+                    os.remove(bin_path)
+
             existing = set()
             if os.path.isfile(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    existing = {line.strip() for line in f if line.strip()}
+                existing = set(read_text_words(file_path))
 
             new_set = word_set - existing
             new_words_count[length] = len(new_set)
 
             combined = existing.union(word_set)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                for w in sorted(combined):
-                    f.write(w + "\n")
+            write_text_words(file_path, sorted(combined))
 
         return new_words_count